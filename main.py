@@ -1,31 +1,116 @@
 import streamlit as st
 import os
 import base64
+import csv
+import functools
+import html
+import io
+import itertools
+import mmap
+import operator
 import re
-import pandas as pd
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, List, Dict, Any, Optional
-
-# Configure default encoding for the script
-sys.stdout.reconfigure(encoding='utf-8')
+from typing import Tuple, List, Any, Optional, Iterator, Iterable, Callable, Union
 
 # Type aliases for clarity
-FileContent = Tuple[str, bool]  # (content, is_binary)
+FileContent = Tuple[Union[str, bytes, mmap.mmap], bool]  # (content, is_binary); bytes or mmap only for raw_binary
 ChunkList = List[str]
 
 # Constants
-EXCLUDE_DIRS = {'.git', 'venv', '__pycache__', 'node_modules', 'dist', 'build', 'models', 'embeddings', 'checkpoints'}
-EXCLUDE_EXTENSIONS = {'.pyc', '.log', '.tmp', '.cache', '.pkl', '.DS_Store', '.onnx', '.bin', '.pt', '.h5', 
-                     '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.xls', '.pdf'}
-EXCLUDE_PATTERNS = [r'bert', r'all-mini-lm', r'\.onnx$', r'\.bin$', r'\.pt$', r'\.h5$']
-SENSITIVE_FILES = {'.env', 'secrets.json', 'config.yml'}
+EXCLUDE_DIRS = frozenset({'.git', 'venv', '__pycache__', 'node_modules', 'dist', 'build', 'models', 'embeddings',
+                          'checkpoints'})
+EXCLUDE_EXTENSIONS = frozenset({'.pyc', '.log', '.tmp', '.cache', '.pkl', '.DS_Store', '.onnx', '.bin', '.pt', '.h5',
+                                '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.xls', '.pdf'})
+SENSITIVE_FILES = frozenset({'.env', 'secrets.json', 'config.yml'})
+
+# Tree-drawing pieces for the structure diagram
+_BRANCH_MID = "├── "
+_BRANCH_LAST = "└── "
+_PREFIX_MID = "│   "
+_PREFIX_LAST = "    "
+
+# Files at least this large are memory-mapped rather than read into a bytes object
+MMAP_THRESHOLD = 1 << 20
+
+# Bytes per base64 block; a multiple of 3 so blocks concatenate without padding
+BASE64_BLOCK_SIZE = 48 * 1024
+
+# HTML fragments for generate_html_version; values are escaped before formatting
+_DIR_TMPL = '<div class="directory"><strong>📁 {name}</strong></div>'
+_FILE_TMPL = '<div class="file">📄 {name}</div>'
+_FILE_CONTENT_TMPL = '<div class="file">📄 {name}</div><div class="file-content">{body}</div>'
+
+# Worker threads used to overlap per-file reads
+READ_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Extensions whose content is always binary, so the null-byte probe can be skipped
+_KNOWN_BINARY_EXT = frozenset({'.pyc', '.pkl', '.onnx', '.bin', '.pt', '.h5', '.png', '.jpg', '.jpeg', '.gif',
+                               '.bmp', '.ico', '.xls', '.pdf', '.zip', '.gz', '.tar', '.exe', '.dll', '.so'})
+
+# Extensions whose content is always text, so the file can be read without a probe
+_KNOWN_TEXT_EXT = frozenset({'.py', '.md', '.txt', '.json', '.yml', '.yaml', '.toml', '.cfg', '.ini', '.html',
+                             '.css', '.js', '.ts', '.jsx', '.tsx', '.xml', '.csv', '.sh', '.rst'})
+
+# Literal name fragments excluded case-insensitively with a plain substring test
+_SUBSTR_EXCLUDES = ('bert', 'all-mini-lm')
+# Regex exclusions; empty by default, extended by custom CSV patterns
+EXCLUDE_PATTERNS: List[str] = []
+
+
+@functools.lru_cache(maxsize=32)
+def compile_exclude_patterns(patterns: Tuple[str, ...]) -> Optional[re.Pattern]:
+    """Fuse exclusion patterns into one case-insensitive alternation regex.
+
+    Cached on the pattern tuple so Streamlit reruns with the same CSV upload
+    reuse the compiled regex instead of building it again.
+    """
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+
+
+# Precompiled forms of the exclusions above, checked once per visited file
+_EXCLUDE_ONE = compile_exclude_patterns(tuple(EXCLUDE_PATTERNS))
+# Lowercased so extension checks are case-insensitive, covering .PT, .ONNX and the like
+EXCLUDE_EXT_TUPLE = tuple(ext.lower() for ext in EXCLUDE_EXTENSIONS)
+
+
+def rebuild_exclude_patterns() -> None:
+    """Recompile the fused exclusion regex after EXCLUDE_PATTERNS changes."""
+    global _EXCLUDE_ONE
+    compiled = compile_exclude_patterns(tuple(EXCLUDE_PATTERNS))
+    if compiled is not _EXCLUDE_ONE:
+        _EXCLUDE_ONE = compiled
+        FileHandler.should_exclude_file.cache_clear()
+
+
+def map_in_order(func: Callable[[Any], Any], items: Iterable[Any]) -> Iterator[Any]:
+    """Run func over items on a thread pool, yielding results in input order.
+
+    At most twice the worker count of calls are in flight, so memory stays
+    bounded when the consumer is slower than the disk.
+    """
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= READ_WORKERS * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 class FileHandler:
     @staticmethod
     def is_binary(file_path: str) -> bool:
-        """Check if a file is binary by reading a small chunk and checking for null bytes."""
+        """Check if a file is binary by reading a small chunk and checking for null bytes.
+
+        Not on the output path: read_file_contents applies the same 1 KB probe
+        to the bytes it has already read.
+        """
         try:
             chunk_size = 1024
             with open(file_path, 'rb') as f:
@@ -35,65 +120,227 @@ class FileHandler:
             return True
 
     @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def should_exclude_file(file_name: str) -> bool:
-        """Check if a file should be excluded based on its name or pattern."""
+        """Check if a file should be excluded based on its name or pattern.
+
+        Memoised per name, since names like __init__.py recur across a tree and
+        each is checked by the diagram, the walk and the content pass.
+        """
         if file_name in SENSITIVE_FILES:
             return True
         
-        if any(file_name.endswith(ext) for ext in EXCLUDE_EXTENSIONS):
+        name = file_name.lower()
+        if name.endswith(EXCLUDE_EXT_TUPLE):
             return True
         
-        if any(re.search(pattern, file_name, re.IGNORECASE) for pattern in EXCLUDE_PATTERNS):
+        for substring in _SUBSTR_EXCLUDES:
+            if substring in name:
+                return True
+        
+        if _EXCLUDE_ONE is not None and _EXCLUDE_ONE.search(file_name):
             return True
         
         return False
 
     @staticmethod
-    def read_file_contents(file_path: str) -> FileContent:
-        """Read file contents with proper encoding handling."""
+    def encode_base64_blocks(data) -> Iterator[str]:
+        """Base64-encode a buffer in 3-byte-aligned blocks so no block needs padding."""
+        for start in range(0, len(data), BASE64_BLOCK_SIZE):
+            yield base64.b64encode(data[start:start + BASE64_BLOCK_SIZE]).decode('ascii')
+
+    @staticmethod
+    def _decode_text(data: bytes) -> str:
+        """Decode UTF-8 bytes, falling back to replacement characters on invalid input."""
         try:
-            if FileHandler.is_binary(file_path):
-                with open(file_path, 'rb') as file:
-                    return base64.b64encode(file.read()).decode('utf-8'), True
-            
-            try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    return file.read(), False
-            except UnicodeDecodeError:
-                with open(file_path, 'rb') as file:
-                    return file.read().decode('utf-8', errors='replace'), False
+            text = data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data.decode('utf-8', errors='replace')
+        if '\r' in text:
+            # Match text-mode universal newline handling
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    @staticmethod
+    def read_file_contents(file_path: str, skip_binary: bool = False, raw_binary: bool = False) -> FileContent:
+        """Read file contents with proper encoding handling.
+
+        Known text extensions are read directly without a binary probe. Other
+        files are opened once and the binary probe reuses the bytes already
+        read; files above MMAP_THRESHOLD are memory-mapped instead.
+
+        With skip_binary, binary files are detected but not encoded and come
+        back as ("", True). With raw_binary they come back unencoded: as bytes
+        when the probe already read the whole file, otherwise as a read-only
+        mmap that the caller must close.
+        """
+        try:
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in _KNOWN_TEXT_EXT:
+                with open(file_path, 'rb', buffering=0) as file:
+                    return FileHandler._decode_text(file.read()), False
+
+            known_binary = ext in _KNOWN_BINARY_EXT
+            if known_binary and skip_binary:
+                return "", True
+            # Unbuffered: whole-file reads gain nothing from a BufferedReader, and
+            # skipping it also skips its isatty() and lseek() calls on open
+            with open(file_path, 'rb', buffering=0) as file:
+                size = os.fstat(file.fileno()).st_size
+                if size < MMAP_THRESHOLD and not (known_binary and raw_binary):
+                    # Small files: one read serves both the probe and the content
+                    data = file.read()
+                    if known_binary or b'\x00' in data[:1024]:
+                        if skip_binary:
+                            return "", True
+                        if raw_binary:
+                            return data, True
+                        return base64.b64encode(data).decode('ascii'), True
+                elif size == 0:
+                    # An empty known-binary file; there is nothing to map
+                    return b"", True
+                else:
+                    mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                    if raw_binary and (known_binary or b'\x00' in mm[:1024]):
+                        # Handed over still mapped; the caller encodes it in blocks and closes it
+                        return mm, True
+                    with mm:
+                        if known_binary or b'\x00' in mm[:1024]:
+                            if skip_binary:
+                                return "", True
+                            return "".join(FileHandler.encode_base64_blocks(mm)), True
+                        data = mm[:]
+
+            return FileHandler._decode_text(data), False
         except Exception as e:
             return f"Error reading file: {str(e)}", False
 
 class ProjectStructure:
     @staticmethod
-    def generate_structure_diagram(root_dir: str) -> str:
-        """Generate a directory and file structure diagram."""
-        structure = []
+    def walk_project(root_dir: str, exclude_dirs: frozenset,
+                     follow_symlinks: bool = False) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """Walk a directory top-down with os.scandir, yielding (dirpath, file entries) like os.walk."""
+        stack = [root_dir]
+        # (st_dev, st_ino) of every directory entered, so a loop is never walked twice
+        visited = set()
+        while stack:
+            dir_path = stack.pop()
+            try:
+                st = os.stat(dir_path)
+                key = (st.st_dev, st.st_ino)
+                if key in visited:
+                    continue
+                visited.add(key)
+                with os.scandir(dir_path) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+
+            subdirs = []
+            files = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    name = entry.name
+                    # Directories the structure diagram marks as excluded are not descended
+                    if (name not in exclude_dirs and (follow_symlinks or not entry.is_symlink())
+                            and not FileHandler.should_exclude_file(name)):
+                        subdirs.append(entry.path)
+                else:
+                    files.append(entry)
+
+            yield dir_path, files
+            # Reversed so the first subdirectory is popped next, matching os.walk order
+            stack.extend(reversed(subdirs))
+
+    @staticmethod
+    def scan_project(root_dir: str, exclude_dirs: frozenset,
+                     follow_symlinks: bool = False) -> Iterator[Tuple[str, Optional[os.DirEntry], str, bool]]:
+        """Scan the whole tree once, yielding one record per structure-diagram line.
+
+        Each record is (diagram line, entry, relative path, is_content_file).
+        The diagram covers every directory, while is_content_file is only set
+        for regular files outside excluded or pattern-matched directories, so
+        the same pass feeds both the diagram and the file details.
+        """
 
-        def build_tree(dir_path: str, prefix: str = "") -> None:
+        def list_children(dir_path: str, prefix: str, rel_prefix: str, in_scope: bool) -> list:
+            """Return stack items (line, entry, relative path, child prefix, is_content_file, descend_in_scope)."""
             try:
-                entries = sorted(os.listdir(dir_path))
-                for i, entry in enumerate(entries):
-                    full_path = os.path.join(dir_path, entry)
-                    is_last = (i == len(entries) - 1)
-                    is_excluded = entry in EXCLUDE_DIRS or FileHandler.should_exclude_file(entry)
-                    
-                    structure.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}"
-                                   f"{' [EXCLUDED]' if is_excluded else ''}")
-                    
-                    if os.path.isdir(full_path):
-                        build_tree(full_path, prefix + ("    " if is_last else "│   "))
-            except Exception as e:
-                structure.append(f"{prefix}Error reading directory: {str(e)}")
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError as e:
+                return [(f"{prefix}Error reading directory: {str(e)}", None, "", "", False, False)]
+
+            branch_mid = prefix + _BRANCH_MID
+            child_prefix_mid = prefix + _PREFIX_MID
+            child_prefix_last = prefix + _PREFIX_LAST
+            last_index = len(entries) - 1
+            children = []
+            for i, entry in enumerate(entries):
+                name = entry.name
+                is_last = (i == last_index)
+                is_excluded = name in EXCLUDE_DIRS or FileHandler.should_exclude_file(name)
+                
+                line = (prefix + _BRANCH_LAST if is_last else branch_mid) + name
+                if is_excluded:
+                    line += " [EXCLUDED]"
+                
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=follow_symlinks)
+                    is_file = not is_dir and entry.is_file()
+                except OSError:
+                    is_dir = is_file = False
+                if is_dir:
+                    descend_in_scope = (in_scope and name not in exclude_dirs
+                                        and not FileHandler.should_exclude_file(name))
+                else:
+                    descend_in_scope = False
+                children.append((line, entry, rel_prefix + name, child_prefix_last if is_last else child_prefix_mid,
+                                 in_scope and is_file, descend_in_scope))
+            return children
+
+        # (st_dev, st_ino) of every directory listed; a directory reached again through a
+        # symlink or bind mount still gets its diagram line but is not expanded twice.
+        # Taken from os.stat: DirEntry.stat() reports st_ino and st_dev as 0 on Windows.
+        try:
+            st = os.stat(root_dir)
+            visited = {(st.st_dev, st.st_ino)}
+        except OSError:
+            # list_children reports the unreadable root as an "Error reading directory" line
+            visited = set()
+
+        # Depth-first with an explicit stack; children are pushed reversed to keep sorted order
+        stack = list_children(root_dir, "", "", True)[::-1]
+        while stack:
+            line, entry, rel_path, child_prefix, is_content_file, descend_in_scope = stack.pop()
+            yield line, entry, rel_path, is_content_file
+            if entry is None or not entry.is_dir(follow_symlinks=follow_symlinks):
+                continue
+            try:
+                st = os.stat(entry.path)
+            except OSError:
+                continue
+            key = (st.st_dev, st.st_ino)
+            if key in visited:
+                continue
+            visited.add(key)
+            stack.extend(reversed(list_children(entry.path, child_prefix, rel_path + os.sep, descend_in_scope)))
 
-        build_tree(root_dir)
-        return "\n".join(structure)
+    @staticmethod
+    def generate_structure_diagram(root_dir: str) -> str:
+        """Generate a directory and file structure diagram."""
+        return "\n".join(line for line, _, _, _ in ProjectStructure.scan_project(root_dir, EXCLUDE_DIRS))
 
     @staticmethod
-    def generate_html_version(project_dir: str, exclude_dirs: List[str], exclude_extensions: List[str]) -> str:
+    def generate_html_version(project_dir: str, exclude_dirs: Iterable[str], exclude_extensions: Iterable[str]) -> str:
         """Generate an HTML version of the project structure."""
-        html_content = """
+        exclude_dirs = frozenset(exclude_dirs)
+        exclude_extensions = tuple(exclude_extensions)
+        parts = ["""
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -109,45 +356,222 @@ class ProjectStructure:
         </head>
         <body>
             <h1>Project Structure</h1>
-        """
+        """]
 
-        for dirpath, dirnames, filenames in os.walk(project_dir):
-            dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
+        for dirpath, files in ProjectStructure.walk_project(project_dir, exclude_dirs):
             rel_path = os.path.relpath(dirpath, project_dir)
             if rel_path != '.':
-                html_content += f'<div class="directory"><strong>📁 {rel_path}</strong></div>'
+                parts.append(_DIR_TMPL.format(name=html.escape(rel_path, quote=False)))
             
-            for filename in filenames:
-                if any(filename.endswith(ext) for ext in exclude_extensions):
+            for entry in files:
+                filename = entry.name
+                if filename.endswith(exclude_extensions):
                     continue
                 if filename in SENSITIVE_FILES:
                     continue
                 
-                file_path = os.path.join(dirpath, filename)
-                html_content += f'<div class="file">📄 {filename}</div>'
-                content, is_binary = FileHandler.read_file_contents(file_path)
-                if not is_binary:
-                    html_content += f'<div class="file-content">{content}</div>'
+                content, is_binary = FileHandler.read_file_contents(entry.path, skip_binary=True)
+                if is_binary:
+                    parts.append(_FILE_TMPL.format(name=html.escape(filename, quote=False)))
+                else:
+                    parts.append(_FILE_CONTENT_TMPL.format(
+                        name=html.escape(filename, quote=False),
+                        body=html.escape(content, quote=False)
+                    ))
 
-        html_content += "</body></html>"
-        return html_content
+        parts.append("</body></html>")
+        return "".join(parts)
 
 class ContentGenerator:
+    @staticmethod
+    def iter_chunk_parts(pieces: Iterable[str], lines_per_file: int = 2000) -> Iterator[Tuple[int, str]]:
+        """Yield the chunks of lines_per_file lines as (chunk number, text) parts.
+
+        Parts come in order, and each chunk yields at least one part. A piece
+        is only cut where a chunk boundary falls inside it, so a long
+        single-line base64 payload passes through block by block instead of
+        being buffered until its line ends.
+        """
+        chunk_no = 1
+        line_count = 0
+        # A newline is held back until more text follows it: the one ending the output is dropped
+        pending_newline = False
+        for piece in pieces:
+            start = 0
+            newlines = piece.count("\n")
+            while line_count + newlines >= lines_per_file:
+                end = start - 1
+                for _ in range(lines_per_file - line_count):
+                    end = piece.find("\n", end + 1)
+                if pending_newline:
+                    yield chunk_no, "\n"
+                # The newline that ends the chunk's last line is not part of the chunk
+                yield chunk_no, piece[start:end]
+                newlines -= lines_per_file - line_count
+                start = end + 1
+                chunk_no += 1
+                line_count = 0
+                pending_newline = False
+
+            if start == len(piece):
+                continue
+            rest = piece[start:] if start else piece
+            if pending_newline:
+                yield chunk_no, "\n"
+            line_count += newlines
+            pending_newline = rest.endswith("\n")
+            if pending_newline:
+                rest = rest[:-1]
+            if rest:
+                yield chunk_no, rest
+
+    @staticmethod
+    def iter_chunks(pieces: Iterable[str], lines_per_file: int = 2000) -> Iterator[str]:
+        """Concatenate pieces and yield chunks of lines_per_file lines as they fill up."""
+        parts = ContentGenerator.iter_chunk_parts(pieces, lines_per_file)
+        for _, chunk_parts in itertools.groupby(parts, key=operator.itemgetter(0)):
+            yield "".join(part for _, part in chunk_parts)
+
     @staticmethod
     def split_content(content: str, lines_per_file: int = 2000) -> ChunkList:
         """Split content into chunks."""
-        lines = content.splitlines()
-        chunks = [lines[i:i + lines_per_file] for i in range(0, len(lines), lines_per_file)]
-        return ["\n".join(chunk) for chunk in chunks]
+        return list(ContentGenerator.iter_chunks([content], lines_per_file))
+
+    @staticmethod
+    def iter_sections(root_dir: str, exclude_dirs: frozenset) -> Iterator[str]:
+        """Yield the README, structure diagram and per-file sections of the output in order."""
+        # One scan of the tree yields both the structure diagram and the files to include
+        readme_path = None
+        structure = []
+        files_info = []
+        for line, entry, relative_path, is_content_file in ProjectStructure.scan_project(root_dir, exclude_dirs):
+            structure.append(line)
+            if not is_content_file:
+                continue
+            filename = entry.name
+            if readme_path is None and relative_path == filename and filename.startswith('README'):
+                readme_path = entry.path
+            if filename in SENSITIVE_FILES:
+                continue
+            is_excluded = FileHandler.should_exclude_file(filename)
+            files_info.append((entry.path, relative_path, filename, entry.stat().st_size, is_excluded))
+
+        # Every piece after the first starts with the newline that separates it from the previous one
+        if readme_path is not None:
+            readme_content, _ = FileHandler.read_file_contents(readme_path)
+            yield "===== README =====\n"
+            yield "\n" + readme_content + "\n\n"
+            yield "\n===== PROJECT STRUCTURE =====\n"
+        else:
+            yield "===== PROJECT STRUCTURE =====\n"
+        yield "\n" + "\n".join(structure) + "\n\n"
+        yield "\n===== FILE DETAILS =====\n"
+
+        # Files are read and formatted in worker threads; results still come back in scan order.
+        # Binary files are opened and probed there too, and base64-streamed here in blocks
+        # from the bytes or memory map the worker hands over.
+        blocks = map_in_order(ContentGenerator.format_file_block, files_info)
+        for block, binary_data in blocks:
+            yield block
+            if binary_data is None:
+                continue
+            try:
+                yield from FileHandler.encode_base64_blocks(binary_data)
+            except OSError as e:
+                yield f"Error reading file: {str(e)}"
+            finally:
+                if isinstance(binary_data, mmap.mmap):
+                    binary_data.close()
+            yield "\n\n"
+
+    @staticmethod
+    def format_file_block(file_info: Tuple[str, str, str, int, bool]) -> Tuple[str, Union[bytes, mmap.mmap, None]]:
+        """Read one file and format its output section.
+
+        Returns the section text and, for binary files, the content to encode:
+        bytes, or an open mmap that the caller must close. For binary files the
+        text stops where the base64 payload and its trailing blank line should
+        follow; for other files the content is None.
+        """
+        file_path, relative_path, filename, size, is_excluded = file_info
+        header = (f"\n===== FILE: {relative_path} =====\n"
+                  f"\nName: {filename}\n"
+                  f"\nSize: {size} bytes\n"
+                  f"\nExtension: {os.path.splitext(filename)[1]}\n")
+
+        if is_excluded:
+            return header + "\nStatus: Excluded (content not included)\n\n", None
+
+        file_content, is_binary = FileHandler.read_file_contents(file_path, raw_binary=True)
+        if is_binary:
+            return (header + "\nType: Binary (Base64)\n"
+                    f"\nContent Length: {4 * ((size + 2) // 3)}\n\n\n"), file_content
+
+        return (header + "\nType: Text\n"
+                f"\nContent Length: {len(file_content)}\n\n"
+                "\n" + file_content + "\n\n"), None
+
+    @staticmethod
+    def write_chunks(parts: Iterable[Tuple[int, str]], root_dir: str, super_file_name: str, ext: str) -> None:
+        """Write chunk parts to numbered files in root_dir and offer each finished file for download."""
+        chunk_no = 0
+        chunk_path = None
+        chunk_file = None  # None once the current chunk has failed
+        try:
+            for i, part in parts:
+                if i != chunk_no:
+                    if chunk_file is not None:
+                        ContentGenerator._finish_chunk(chunk_no, chunk_path, chunk_file)
+                    chunk_no = i
+                    chunk_path = Path(root_dir) / f"{super_file_name}_{i}{ext}"
+                    try:
+                        chunk_file = open(chunk_path, 'wb')
+                    except Exception as e:
+                        chunk_file = None
+                        st.error(f"Error saving chunk {i}: {str(e)}")
+                if chunk_file is None:
+                    continue
+                try:
+                    chunk_file.write(part.encode('utf-8', errors='replace'))
+                except Exception as e:
+                    chunk_file.close()
+                    chunk_file = None
+                    st.error(f"Error saving chunk {i}: {str(e)}")
+            if chunk_file is not None:
+                ContentGenerator._finish_chunk(chunk_no, chunk_path, chunk_file)
+                chunk_file = None
+        finally:
+            if chunk_file is not None:
+                chunk_file.close()
+
+    @staticmethod
+    def _finish_chunk(i: int, chunk_path: Path, chunk_file) -> None:
+        """Close a written chunk file and offer it for download."""
+        try:
+            chunk_file.close()
+            st.success(f"Chunk {i} created at: {chunk_path}")
+
+            # Deliberate trade-off: the chunk was written part by part and is read back here, one
+            # extra read per chunk, instead of also collecting its encoded parts while writing.
+            # download_button keeps its data in memory, so this is the one place a whole chunk is held
+            st.download_button(
+                label=f"Download {chunk_path.name}",
+                data=chunk_path.read_bytes(),
+                file_name=chunk_path.name,
+                mime="text/plain"
+            )
+        except Exception as e:
+            st.error(f"Error saving chunk {i}: {str(e)}")
 
     @staticmethod
     def create_super_file(root_dir: str, output_format: str, super_file_name: str = 'master_file.txt',
-                         exclude_dirs: List[str] = None, exclude_extensions: List[str] = None) -> None:
+                         exclude_dirs: Optional[Iterable[str]] = None,
+                         exclude_extensions: Optional[Iterable[str]] = None) -> None:
         """Create output file in specified format."""
-        if exclude_dirs is None:
-            exclude_dirs = list(EXCLUDE_DIRS)
-        if exclude_extensions is None:
-            exclude_extensions = list(EXCLUDE_EXTENSIONS)
+        # Frozen once here: membership checks against the list the UI builds were
+        # a linear scan for every directory entry during the walk
+        exclude_dirs = EXCLUDE_DIRS if exclude_dirs is None else frozenset(exclude_dirs)
+        exclude_extensions = EXCLUDE_EXTENSIONS if exclude_extensions is None else frozenset(exclude_extensions)
 
         try:
             if output_format == "HTML (for humans)":
@@ -161,83 +585,29 @@ class ContentGenerator:
                 )
                 return
 
-            # Handle XML and Markdown formats
-            content = []
-            readme_files = list(Path(root_dir).glob('README*'))
-            if readme_files:
-                readme_content, _ = FileHandler.read_file_contents(str(readme_files[0]))
-                content.extend(["===== README =====\n", readme_content + "\n\n"])
-
-            content.extend([
-                "===== PROJECT STRUCTURE =====\n",
-                ProjectStructure.generate_structure_diagram(root_dir) + "\n\n",
-                "===== FILE DETAILS =====\n"
-            ])
-
-            for dirpath, dirnames, filenames in os.walk(root_dir):
-                dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
-                
-                for filename in filenames:
-                    if filename in SENSITIVE_FILES:
-                        continue
-                        
-                    file_path = Path(dirpath) / filename
-                    relative_path = file_path.relative_to(root_dir)
-                    
-                    content.extend([
-                        f"===== FILE: {relative_path} =====\n",
-                        f"Name: {filename}\n",
-                        f"Size: {file_path.stat().st_size} bytes\n",
-                        f"Extension: {file_path.suffix}\n"
-                    ])
-                    
-                    if FileHandler.should_exclude_file(filename):
-                        content.append("Status: Excluded (content not included)\n\n")
-                        continue
-                    
-                    file_content, is_binary = FileHandler.read_file_contents(str(file_path))
-                    content.extend([
-                        f"Type: {'Binary (Base64)' if is_binary else 'Text'}\n",
-                        f"Content Length: {len(file_content)}\n\n",
-                        file_content + "\n\n"
-                    ])
-
-            full_content = "\n".join(content)
-            chunks = ContentGenerator.split_content(full_content)
-
-            for i, chunk in enumerate(chunks, 1):
-                ext = '.xml' if output_format == "XML (for AI/ML)" else '.md'
-                chunk_filename = f"{super_file_name}_{i}{ext}"
-                chunk_path = Path(root_dir) / chunk_filename
-                
-                try:
-                    chunk_path.write_text(chunk, encoding='utf-8', errors='replace')
-                    st.success(f"Chunk {i} created at: {chunk_path}")
-                    
-                    st.download_button(
-                        label=f"Download {chunk_filename}",
-                        data=chunk.encode('utf-8'),
-                        file_name=chunk_filename,
-                        mime="text/plain"
-                    )
-                except Exception as e:
-                    st.error(f"Error saving chunk {i}: {str(e)}")
+            # Handle XML and Markdown formats, writing each chunk's parts as they arrive
+            ext = '.xml' if output_format == "XML (for AI/ML)" else '.md'
+            sections = ContentGenerator.iter_sections(root_dir, exclude_dirs)
+            ContentGenerator.write_chunks(ContentGenerator.iter_chunk_parts(sections), root_dir, super_file_name, ext)
 
         except Exception as e:
             st.error(f"Error generating output: {str(e)}")
             st.error(f"System encoding: {sys.getdefaultencoding()}")
             st.error(f"Filesystem encoding: {sys.getfilesystemencoding()}")
 
-def main():
-    # Set page configuration
-    st.set_page_config(
-        page_title="Project Code Fusion",
-        page_icon="🚀",
-        layout="wide"
-    )
-
-    # Custom CSS
-    st.markdown("""
+def configure_stdout() -> None:
+    """Switch stdout to UTF-8 when it is not already, where the stream supports it."""
+    encoding = getattr(sys.stdout, 'encoding', None)
+    if encoding and encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+        return
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        # Replaced streams (e.g. captured by Streamlit) may not be TextIOWrappers
+        pass
+
+# Custom CSS for the page; static, so it is built once at import rather than per rerun
+_PAGE_CSS = """
     <style>
     h1 { margin-top: 0 !important; padding-top: 0 !important; }
     .stApp {
@@ -287,7 +657,46 @@ def main():
         color: #333333 !important;
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+# Markdown for the help section
+_HELP_MD = """
+        ### 🤖 Quick Guide
+        1. **Select Directory**: Enter the full path to your project folder
+        2. **Configure Options**: 
+           - Use Advanced Configuration to customize exclusions
+           - Upload a CSV file for custom exclusions
+           - Choose your preferred output filename
+        3. **Choose Format**:
+           - XML: Best for AI/ML processing
+           - HTML: Easy to read in a browser
+           - Markdown: Perfect for documentation
+        4. **Generate**: Click 'Generate Output' and download your files
+
+        ### 💡 Tips
+        - Exclude large binary files to reduce output size
+        - Use HTML format for human review
+        - Use XML format for AI processing
+        - Use Markdown for documentation systems
+
+        ### 🔒 Security
+        - Sensitive files (.env, secrets.json, etc.) are automatically excluded
+        - Binary files are encoded safely
+        - Large files are split into manageable chunks
+        """
+
+def main():
+    configure_stdout()
+
+    # Set page configuration
+    st.set_page_config(
+        page_title="Project Code Fusion",
+        page_icon="🚀",
+        layout="wide"
+    )
+
+    # Custom CSS
+    st.markdown(_PAGE_CSS, unsafe_allow_html=True)
 
     # Title
     st.markdown(
@@ -339,17 +748,18 @@ def main():
         
         if uploaded_file is not None:
             try:
-                custom_exclusions = pd.read_csv(uploaded_file)
-                if not set(custom_exclusions.columns) >= {"type", "value"}:
+                reader = csv.DictReader(io.StringIO(uploaded_file.getvalue().decode('utf-8-sig')))
+                if not set(reader.fieldnames or ()) >= {"type", "value"}:
                     st.error("CSV must contain 'type' and 'value' columns.")
                 else:
-                    for _, row in custom_exclusions.iterrows():
+                    for row in reader:
                         if row["type"] == "dir":
                             exclude_dirs.append(row["value"])
                         elif row["type"] == "ext":
                             exclude_extensions.append(row["value"])
-                        elif row["type"] == "pattern":
+                        elif row["type"] == "pattern" and row["value"] not in EXCLUDE_PATTERNS:
                             EXCLUDE_PATTERNS.append(row["value"])
+                    rebuild_exclude_patterns()
                     st.success("Custom exclusions added successfully!")
             except Exception as e:
                 st.error(f"Error reading CSV file: {e}")
@@ -407,30 +817,7 @@ def main():
     # Help section
     st.markdown("---")
     with st.expander("ℹ️ How to Use Project Code Fusion", expanded=False):
-        st.markdown("""
-        ### 🤖 Quick Guide
-        1. **Select Directory**: Enter the full path to your project folder
-        2. **Configure Options**: 
-           - Use Advanced Configuration to customize exclusions
-           - Upload a CSV file for custom exclusions
-           - Choose your preferred output filename
-        3. **Choose Format**:
-           - XML: Best for AI/ML processing
-           - HTML: Easy to read in a browser
-           - Markdown: Perfect for documentation
-        4. **Generate**: Click 'Generate Output' and download your files
-
-        ### 💡 Tips
-        - Exclude large binary files to reduce output size
-        - Use HTML format for human review
-        - Use XML format for AI processing
-        - Use Markdown for documentation systems
-
-        ### 🔒 Security
-        - Sensitive files (.env, secrets.json, etc.) are automatically excluded
-        - Binary files are encoded safely
-        - Large files are split into manageable chunks
-        """)
+        st.markdown(_HELP_MD)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,18 @@
 import streamlit as st
 import os
 import base64
+import csv
+import functools
+import html
+import io
+import itertools
+import mmap
+import operator
 import re
-import pandas as pd
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Tuple, List, Dict, Any, Optional
+from typing import Tuple, List, Dict, Any, Optional, Iterator
 from pop_up import show_popup 
 
 
@@ -13,7 +20,7 @@ from pop_up import show_popup
 sys.stdout.reconfigure(encoding='utf-8')
 
 # Type aliases for clarity
-FileContent = Tuple[str, bool]  # (content, is_binary)
+FileContent = Tuple[Optional[str], bool]  # (content, is_binary); content is None for an omitted binary
 ChunkList = List[str]
 
 # Constants
@@ -23,47 +30,144 @@ EXCLUDE_EXTENSIONS = {'.pyc', '.log', '.tmp', '.cache', '.pkl', '.DS_Store', '.o
 EXCLUDE_PATTERNS = [r'bert', r'all-mini-lm', r'\.onnx$', r'\.bin$', r'\.pt$', r'\.h5$']
 SENSITIVE_FILES = {'.env', 'secrets.json', 'config.yml'}
 
+# Files larger than this are memory-mapped rather than read into a bytes object
+MMAP_THRESHOLD = 1 << 20
+# Binary files larger than this are listed without their base64 content
+MAX_BINARY_INLINE = 1 << 20
+# Flags for the raw descriptor read_file_contents opens; O_BINARY stops Windows translating CRLF and 0x1A
+_READ_FLAGS = os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0) | getattr(os, 'O_BINARY', 0)
+# Bytes that occur in text files: BEL through CR, ESC, printable ASCII and everything
+# above 0x7F (so UTF-8 and legacy 8-bit text stay text)
+_TEXT_CHARS = bytes(range(7, 14)) + b'\x1b' + bytes(range(32, 127)) + bytes(range(128, 256))
+# Sort key for DirEntry listings; attrgetter runs in C, unlike an equivalent lambda
+_BY_NAME = operator.attrgetter('name')
+# Worker threads used to overlap per-file reads
+READ_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+
+def _compile_exclude_patterns() -> re.Pattern:
+    """Fuse EXCLUDE_PATTERNS into one case-insensitive alternation regex."""
+    return re.compile("|".join(f"(?:{p})" for p in EXCLUDE_PATTERNS), re.IGNORECASE)
+
+
+# Precompiled forms of the exclusions above, checked once per visited file
+_EXCLUDE_RX = _compile_exclude_patterns()
+_EXCLUDE_EXT_TUPLE = tuple(EXCLUDE_EXTENSIONS)
+
+# Literals every built-in pattern needs in the lowercased name; a name without
+# any of them cannot match, so the regex is skipped. Only valid while
+# EXCLUDE_PATTERNS holds the built-in patterns alone
+_DEFAULT_EXCLUDE_PATTERNS = tuple(EXCLUDE_PATTERNS)
+_EXCLUDE_LITERALS: Optional[Tuple[str, ...]] = ('bert', 'all-mini-lm', '.onnx', '.bin', '.pt', '.h5')
+
+
+def rebuild_exclude_patterns() -> None:
+    """Recompile the fused exclusion regex after EXCLUDE_PATTERNS changes."""
+    global _EXCLUDE_RX, _EXCLUDE_LITERALS
+    _EXCLUDE_RX = _compile_exclude_patterns()
+    if tuple(EXCLUDE_PATTERNS) != _DEFAULT_EXCLUDE_PATTERNS:
+        # Custom patterns may match names without any of the literals
+        _EXCLUDE_LITERALS = None
+    _should_exclude.cache_clear()
+
+
+# Memoised per name: names like __init__.py recur across a tree, and each is
+# checked by both the structure diagram and the file pass; the bound keeps huge trees in check
+@functools.lru_cache(maxsize=8192)
+def _should_exclude(file_name: str) -> bool:
+    """Check a file name against the sensitive-file, extension and pattern exclusions."""
+    if file_name in SENSITIVE_FILES:
+        return True
+    
+    if file_name.endswith(_EXCLUDE_EXT_TUPLE):
+        return True
+    
+    if _EXCLUDE_LITERALS is not None:
+        name = file_name.lower()
+        if not any(literal in name for literal in _EXCLUDE_LITERALS):
+            return False
+    
+    if _EXCLUDE_RX.search(file_name) is not None:
+        return True
+    
+    return False
+
 
 class FileHandler:
     @staticmethod
     def is_binary(file_path: str) -> bool:
-        """Check if a file is binary by reading a small chunk and checking for null bytes."""
+        """Check if a file is binary by reading a small chunk and checking for non-text bytes."""
         try:
             chunk_size = 1024
             with open(file_path, 'rb') as f:
                 chunk = f.read(chunk_size)
-                return b'\x00' in chunk
+                return FileHandler._looks_binary(chunk)
         except Exception:
             return True
 
+    @staticmethod
+    def _looks_binary(head: bytes) -> bool:
+        """Check a file's leading bytes for a null byte or any other non-text control byte."""
+        # translate deletes every text byte in one C loop; anything left over is binary
+        return b'\x00' in head or bool(head.translate(None, _TEXT_CHARS))
+
     @staticmethod
     def should_exclude_file(file_name: str) -> bool:
         """Check if a file should be excluded based on its name or pattern."""
-        if file_name in SENSITIVE_FILES:
-            return True
-        
-        if any(file_name.endswith(ext) for ext in EXCLUDE_EXTENSIONS):
-            return True
-        
-        if any(re.search(pattern, file_name, re.IGNORECASE) for pattern in EXCLUDE_PATTERNS):
-            return True
-        
-        return False
+        return _should_exclude(file_name)
+
+    @staticmethod
+    def _read_all(fd: int, size: int) -> bytes:
+        """Read an open file to EOF, sizing the first read() from fstat."""
+        # A read may return fewer bytes than asked for, so only an empty read marks EOF
+        chunks = []
+        block = os.read(fd, size + 1)
+        while block:
+            chunks.append(block)
+            block = os.read(fd, 1 << 16)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _decode_contents(data) -> FileContent:
+        """Turn raw file bytes (or a mapped buffer) into base64 or decoded text."""
+        if FileHandler._looks_binary(data[:1024]):
+            return base64.b64encode(data).decode('ascii'), True
+
+        try:
+            text = str(data, 'utf-8')
+        except UnicodeDecodeError:
+            return str(data, 'utf-8', 'replace'), False
+        if '\r' in text:
+            # Match text-mode universal newline handling
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text, False
 
     @staticmethod
     def read_file_contents(file_path: str) -> FileContent:
-        """Read file contents with proper encoding handling."""
+        """Read file contents with proper encoding handling.
+
+        The file is opened once and read with a single read() sized from
+        fstat; files above MMAP_THRESHOLD are memory-mapped instead. The
+        binary probe that is_binary performs runs on the first 1 KB of
+        the same data. Binary files above MAX_BINARY_INLINE are only probed,
+        and come back as (None, True) instead of base64.
+        """
         try:
-            if FileHandler.is_binary(file_path):
-                with open(file_path, 'rb') as file:
-                    return base64.b64encode(file.read()).decode('utf-8'), True
-            
+            fd = os.open(file_path, _READ_FLAGS)
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    return file.read(), False
-            except UnicodeDecodeError:
-                with open(file_path, 'rb') as file:
-                    return file.read().decode('utf-8', errors='replace'), False
+                size = os.fstat(fd).st_size
+                if size > MAX_BINARY_INLINE:
+                    # read + lseek rather than os.pread, which Windows lacks
+                    if FileHandler._looks_binary(os.read(fd, 1024)):
+                        return None, True
+                    os.lseek(fd, 0, os.SEEK_SET)
+                if size > MMAP_THRESHOLD:
+                    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                        return FileHandler._decode_contents(mm)
+                data = FileHandler._read_all(fd, size)
+            finally:
+                os.close(fd)
+            return FileHandler._decode_contents(data)
         except Exception as e:
             return f"Error reading file: {str(e)}", False
 
@@ -73,25 +177,61 @@ class ProjectStructure:
         """Generate a directory and file structure diagram."""
         structure = []
 
-        def build_tree(dir_path: str, prefix: str = "") -> None:
+        def list_children(dir_path: str, prefix: str) -> list:
+            """Return stack items (line, directory to expand or None, child prefix) for one directory."""
             try:
-                entries = sorted(os.listdir(dir_path))
+                with os.scandir(dir_path) as it:
+                    entries = sorted(it, key=_BY_NAME)
+                children = []
                 for i, entry in enumerate(entries):
-                    full_path = os.path.join(dir_path, entry)
+                    name = entry.name
                     is_last = (i == len(entries) - 1)
-                    is_excluded = entry in EXCLUDE_DIRS or FileHandler.should_exclude_file(entry)
+                    is_excluded = name in EXCLUDE_DIRS or FileHandler.should_exclude_file(name)
                     
-                    structure.append(f"{prefix}{'└── ' if is_last else '├── '}{entry}"
-                                   f"{' ' if is_excluded else ''}")
+                    line = (f"{prefix}{'└── ' if is_last else '├── '}{name}"
+                            f"{' ' if is_excluded else ''}")
                     
-                    if os.path.isdir(full_path):
-                        build_tree(full_path, prefix + ("    " if is_last else "│   "))
+                    # Excluded directories are listed but not expanded
+                    expand = entry.path if name not in EXCLUDE_DIRS and entry.is_dir(follow_symlinks=False) else None
+                    children.append((line, expand, prefix + ("    " if is_last else "│   ")))
+                return children
             except Exception as e:
-                structure.append(f"{prefix}Error reading directory: {str(e)}")
-
-        build_tree(root_dir)
+                return [(f"{prefix}Error reading directory: {str(e)}", None, "")]
+
+        # Depth-first with an explicit stack; children are pushed reversed to keep sorted order
+        stack = list_children(root_dir, "")[::-1]
+        while stack:
+            line, dir_path, child_prefix = stack.pop()
+            structure.append(line)
+            if dir_path is not None:
+                stack.extend(reversed(list_children(dir_path, child_prefix)))
         return "\n".join(structure)
 
+    @staticmethod
+    def _walk_scandir(root_dir: str, exclude_dirs) -> Iterator[Tuple[str, List[os.DirEntry]]]:
+        """Walk a directory top-down with os.scandir, yielding (dirpath, file entries) like os.walk."""
+        try:
+            with os.scandir(root_dir) as it:
+                entries = list(it)
+        except OSError:
+            return
+
+        subdirs = []
+        files = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                if entry.name not in exclude_dirs and not entry.is_symlink():
+                    subdirs.append(entry.path)
+            else:
+                files.append(entry)
+
+        yield root_dir, files
+        for subdir in subdirs:
+            yield from ProjectStructure._walk_scandir(subdir, exclude_dirs)
 
 
 class SmartChunker:
@@ -107,6 +247,8 @@ class SmartChunker:
             r'^\s*#.*?[-=]{3,}',  # Comment section breaks
             r'^\s*$'  # Empty lines (lowest priority)
         ]
+        # Compiled once per chunker; find_break_point runs once per chunk boundary
+        self._compiled_breaks = [re.compile(p, re.MULTILINE) for p in self.break_patterns]
 
     def find_break_point(self, text: str, around_position: int) -> int:
         """Find the most appropriate break point near the target position."""
@@ -117,8 +259,8 @@ class SmartChunker:
         search_text = text[start:end]
         
         # Try each pattern in order of priority
-        for pattern in self.break_patterns:
-            matches = list(re.finditer(pattern, search_text, re.MULTILINE))
+        for rx in self._compiled_breaks:
+            matches = list(rx.finditer(search_text))
             if matches:
                 # Find the closest match to the target position
                 closest_match = min(matches, 
@@ -126,9 +268,12 @@ class SmartChunker:
                 return closest_match.start() + start
 
         # Fallback: Break at the nearest newline
-        newlines = [m.start() + start for m in re.finditer(r'\n', text[start:end])]
-        if newlines:
-            return min(newlines, key=lambda pos: abs(pos - around_position))
+        before = text.rfind('\n', start, around_position)
+        after = text.find('\n', around_position, end)
+        if before != -1 and (after == -1 or around_position - before <= after - around_position):
+            return before
+        if after != -1:
+            return after
             
         # Last resort: Break at exact position
         return around_position
@@ -139,8 +284,8 @@ class SmartChunker:
         
         # Adjust cost based on content complexity
         cost += chunk.count('\n') * 0.5  # Line breaks
-        cost += len(re.findall(r'[{}\[\]()]', chunk)) * 2  # Code structure
-        cost += len(re.findall(r'===== FILE:.*?=====', chunk)) * 10  # File headers
+        cost += sum(chunk.count(c) for c in '{}[]()') * 2  # Code structure
+        cost += chunk.count('===== FILE:') * 10  # File headers
         
         return cost
 
@@ -149,31 +294,40 @@ class SmartChunker:
         if not chunks:
             return chunks
             
-        # Calculate costs and target cost
-        costs = [self.estimate_chunk_cost(chunk) for chunk in chunks]
-        avg_cost = sum(costs) / len(costs)
+        # Calculate costs and target cost; each chunk is costed exactly once
+        costed = [(chunk, self.estimate_chunk_cost(chunk)) for chunk in chunks]
+        avg_cost = sum(cost for _, cost in costed) / len(costed)
         
-        # Merge or split chunks based on costs
+        # Merge or split chunks based on costs; merged runs are joined once
         optimized = []
-        current_chunk = chunks[0]
-        current_cost = costs[0]
+        current_parts = [chunks[0]]
+        current_cost = costed[0][1]
         
-        for chunk, cost in zip(chunks[1:], costs[1:]):
+        for chunk, cost in itertools.islice(costed, 1, None):
             if current_cost + cost < avg_cost * 1.5:
-                current_chunk += '\n' + chunk
+                current_parts.append(chunk)
                 current_cost += cost
             else:
-                optimized.append(current_chunk)
-                current_chunk = chunk
+                optimized.append('\n'.join(current_parts))
+                current_parts = [chunk]
                 current_cost = cost
         
-        optimized.append(current_chunk)
+        optimized.append('\n'.join(current_parts))
         return optimized
 
-    def chunk_content(self, content: str) -> List[str]:
-        """Split content into intelligent chunks."""
-        lines = content.splitlines()
-        if len(lines) <= self.target_chunk_size:
+    @staticmethod
+    def count_lines(content: str) -> int:
+        """Count lines the way splitlines() does for '\n'-separated text, without building the list."""
+        return content.count('\n') + (0 if content.endswith('\n') else 1)
+
+    def chunk_content(self, content: str, line_count: Optional[int] = None) -> List[str]:
+        """Split content into intelligent chunks.
+
+        line_count is count_lines(content), for callers that already have it.
+        """
+        if line_count is None:
+            line_count = self.count_lines(content)
+        if line_count <= self.target_chunk_size:
             return [content]
 
         chunks = []
@@ -184,7 +338,7 @@ class SmartChunker:
             # Calculate approximate end position for this chunk
             target_end = min(
                 current_position + (self.target_chunk_size * 
-                                  len(content) // len(lines)),
+                                  len(content) // line_count),
                 content_length
             )
             
@@ -202,6 +356,13 @@ class SmartChunker:
 
 
 
+# Cached across Streamlit reruns; a changed README gets a new mtime and so a new key
+@st.cache_data(show_spinner=False)
+def _cached_readme(readme_path: str, mtime_ns: int) -> Optional[str]:
+    """Return the contents of a README file."""
+    return FileHandler.read_file_contents(readme_path)[0]
+
+
 class ContentGenerator:
     def __init__(self):
         self.chunker = SmartChunker()
@@ -220,8 +381,12 @@ class ContentGenerator:
         """Split content into smart chunks."""
         if not content:  # Add check for empty content
             return []
+        # Content that fits in one chunk skips the chunker entirely
+        line_count = SmartChunker.count_lines(content)
+        if line_count <= chunk_size:
+            return [content]
         self.chunker.target_chunk_size = chunk_size
-        return self.chunker.chunk_content(content)
+        return self.chunker.chunk_content(content, line_count)
 
     @staticmethod
     def create_super_file(root_dir: str, output_format: str, super_file_name: str = 'master_file.txt',
@@ -245,7 +410,7 @@ class ContentGenerator:
 
         try:
             if output_format == "HTML (for humans)":
-                html_content = ProjectStructure.generate_html_version(root_dir, exclude_dirs, exclude_extensions)
+                html_content = ContentGenerator.generate_html_version(root_dir, exclude_dirs, exclude_extensions)
                 st.success("✨ HTML Generated Successfully!")
                 st.download_button(
                     label="Download HTML",
@@ -255,63 +420,79 @@ class ContentGenerator:
                 )
                 return
 
-            # Initialize content list
-            content = []
+            # Output is written as it is produced; every piece after the first is
+            # preceded by a newline, as a "\n".join over a list of pieces would do
+            buf = io.StringIO()
+
+            def emit(*pieces: str) -> None:
+                for piece in pieces:
+                    if buf.tell():
+                        buf.write("\n")
+                    buf.write(piece)
 
             # Add README if exists
             readme_files = list(Path(root_dir).glob('README*'))
             if readme_files:
-                readme_content, _ = FileHandler.read_file_contents(str(readme_files[0]))
+                readme_path = str(readme_files[0])
+                readme_content = _cached_readme(readme_path, os.stat(readme_path).st_mtime_ns)
                 if readme_content:  # Check if readme content exists
-                    content.extend(["===== README =====\n", readme_content + "\n\n"])
+                    emit("===== README =====\n", readme_content + "\n\n")
 
             # Add project structure
             structure = ProjectStructure.generate_structure_diagram(root_dir)
             if structure:  # Check if structure exists
-                content.extend([
+                emit(
                     "===== PROJECT STRUCTURE =====\n",
                     structure + "\n\n",
                     "===== FILE DETAILS =====\n"
-                ])
+                )
 
-            # Process files
-            for dirpath, dirnames, filenames in os.walk(root_dir):
-                dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
-                
-                for filename in filenames:
+            # Process files: the walk collects them, then a thread pool reads them
+            # while results are consumed in walk order
+            files_info = []
+            for dirpath, files in ProjectStructure._walk_scandir(root_dir, exclude_dirs):
+                for entry in files:
+                    filename = entry.name
                     if filename in SENSITIVE_FILES:
                         continue
-                        
-                    file_path = Path(dirpath) / filename
-                    relative_path = file_path.relative_to(root_dir)
-                    
+                    files_info.append((entry.path, os.path.relpath(entry.path, root_dir), filename,
+                                       entry.stat().st_size, FileHandler.should_exclude_file(filename)))
+
+            read_paths = [file_path for file_path, _, _, _, is_excluded in files_info if not is_excluded]
+            with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+                contents = executor.map(FileHandler.read_file_contents, read_paths)
+                for file_path, relative_path, filename, size, is_excluded in files_info:
                     file_info = [
                         f"===== FILE: {relative_path} =====\n",
                         f"Name: {filename}\n",
-                        f"Size: {file_path.stat().st_size} bytes\n",
-                        f"Extension: {file_path.suffix}\n"
+                        f"Size: {size} bytes\n",
+                        f"Extension: {os.path.splitext(filename)[1]}\n"
                     ]
                     
-                    if FileHandler.should_exclude_file(filename):
+                    if is_excluded:
                         file_info.append("Status: Excluded (content not included)\n\n")
-                        content.extend(file_info)
+                        emit(*file_info)
                         continue
                     
-                    file_content, is_binary = FileHandler.read_file_contents(str(file_path))
-                    if file_content:  # Check if file content exists
+                    file_content, is_binary = next(contents)
+                    if file_content is None:
+                        file_info.append(f"Status: Binary omitted ({size} bytes)\n\n")
+                        emit(*file_info)
+                    elif file_content:  # Check if file content exists
                         file_info.extend([
                             f"Type: {'Binary (Base64)' if is_binary else 'Text'}\n",
                             f"Content Length: {len(file_content)}\n\n",
                             file_content + "\n\n"
                         ])
-                        content.extend(file_info)
+                        emit(*file_info)
 
             # Check if we have any content
-            if not content:
+            if not buf.tell():
                 st.warning("No content was generated. Check your directory and exclusion settings.")
                 return
 
-            full_content = "\n".join(content)
+            full_content = buf.getvalue()
+            buf.close()
             chunks = generator.split_content(full_content, chunk_size)
 
             if not chunks:  # Check if chunks were created
@@ -321,9 +502,12 @@ class ContentGenerator:
             # Update total files in session state
             st.session_state.total_files = len(chunks)
 
+            # Encoded once; every download button below and on later reruns reuses these bytes
+            chunks_bytes = [chunk.encode('utf-8') for chunk in chunks]
+
             # Create and offer downloads for each chunk
-            for i, chunk in enumerate(chunks, 1):
-                if not chunk:  # Skip empty chunks
+            for i, chunk_bytes in enumerate(chunks_bytes, 1):
+                if not chunk_bytes:  # Skip empty chunks
                     continue
                     
                 ext = '.xml' if output_format == "XML (for AI/ML)" else '.md'
@@ -331,7 +515,7 @@ class ContentGenerator:
                 
                 st.download_button(
                     label=f"Download {chunk_filename}",
-                    data=chunk.encode('utf-8'),
+                    data=chunk_bytes,
                     file_name=chunk_filename,
                     mime="text/plain",
                     key=f"download_{i}"
@@ -343,22 +527,22 @@ class ContentGenerator:
             # Add download all button if there are multiple chunks
             if len(chunks) > 1:
                 if st.button("Download All"):
-                    for i, chunk in enumerate(chunks, 1):
-                        if not chunk:  # Skip empty chunks
+                    for i, chunk_bytes in enumerate(chunks_bytes, 1):
+                        if not chunk_bytes:  # Skip empty chunks
                             continue
                         ext = '.xml' if output_format == "XML (for AI/ML)" else '.md'
                         chunk_filename = f"{super_file_name}_{i}{ext}"
                         st.download_button(
                             label=f"Download {chunk_filename}",
-                            data=chunk.encode('utf-8'),
+                            data=chunk_bytes,
                             file_name=chunk_filename,
                             mime="text/plain",
                             key=f"download_all_{i}"
                         )
 
-            # Store generated chunks in session state
+            # Store generated chunks in session state, as bytes only
             st.session_state.generated_chunks = {
-                "chunks": chunks,
+                "chunks_bytes": chunks_bytes,
                 "output_format": output_format,
                 "super_file_name": super_file_name,
                 "file_ext": '.xml' if output_format == "XML (for AI/ML)" else '.md'
@@ -374,7 +558,7 @@ class ContentGenerator:
     @staticmethod
     def generate_html_version(project_dir: str, exclude_dirs: List[str], exclude_extensions: List[str]) -> str:
         """Generate an HTML version of the project structure."""
-        html_content = """
+        parts = ["""
         <!DOCTYPE html>
         <html lang="en">
         <head>
@@ -390,28 +574,28 @@ class ContentGenerator:
         </head>
         <body>
             <h1>Project Structure</h1>
-        """
+        """]
 
-        for dirpath, dirnames, filenames in os.walk(project_dir):
-            dirnames[:] = [d for d in dirnames if d not in exclude_dirs]
+        for dirpath, files in ProjectStructure._walk_scandir(project_dir, exclude_dirs):
             rel_path = os.path.relpath(dirpath, project_dir)
             if rel_path != '.':
-                html_content += f'<div class="directory"><strong>📁 {rel_path}</strong></div>'
+                parts.append(f'<div class="directory"><strong>📁 {html.escape(rel_path, quote=False)}</strong></div>')
             
-            for filename in filenames:
+            for entry in files:
+                filename = entry.name
                 if any(filename.endswith(ext) for ext in exclude_extensions):
                     continue
                 if filename in SENSITIVE_FILES:
                     continue
                 
-                file_path = os.path.join(dirpath, filename)
-                html_content += f'<div class="file">📄 {filename}</div>'
+                file_path = entry.path
+                parts.append(f'<div class="file">📄 {html.escape(filename, quote=False)}</div>')
                 content, is_binary = FileHandler.read_file_contents(file_path)
                 if not is_binary:
-                    html_content += f'<div class="file-content">{content}</div>'
+                    parts.append(f'<div class="file-content">{html.escape(content, quote=False)}</div>')
 
-        html_content += "</body></html>"
-        return html_content
+        parts.append("</body></html>")
+        return "".join(parts)
 
 
 def main():
@@ -525,17 +709,18 @@ def main():
         
         if uploaded_file is not None:
             try:
-                custom_exclusions = pd.read_csv(uploaded_file)
-                if not set(custom_exclusions.columns) >= {"type", "value"}:
+                reader = csv.DictReader(io.StringIO(uploaded_file.getvalue().decode('utf-8-sig')))
+                if not set(reader.fieldnames or ()) >= {"type", "value"}:
                     st.error("CSV must contain 'type' and 'value' columns.")
                 else:
-                    for _, row in custom_exclusions.iterrows():
+                    for row in reader:
                         if row["type"] == "dir":
                             exclude_dirs.append(row["value"])
                         elif row["type"] == "ext":
                             exclude_extensions.append(row["value"])
-                        elif row["type"] == "pattern":
+                        elif row["type"] == "pattern" and row["value"] not in EXCLUDE_PATTERNS:
                             EXCLUDE_PATTERNS.append(row["value"])
+                    rebuild_exclude_patterns()
                     st.success("Custom exclusions added successfully!")
             except Exception as e:
                 st.error(f"Error reading CSV file: {e}")
@@ -592,7 +777,7 @@ def main():
             return
 
         if 'generated_chunks' in st.session_state:
-            chunks = st.session_state.generated_chunks['chunks']
+            chunks_bytes = st.session_state.generated_chunks['chunks_bytes']
             file_ext = st.session_state.generated_chunks['file_ext']
             super_name = st.session_state.generated_chunks['super_file_name']
 
@@ -600,11 +785,11 @@ def main():
             st.subheader("Generated Files")
             
             # Individual download buttons
-            for i, chunk in enumerate(chunks, 1):
+            for i, chunk_bytes in enumerate(chunks_bytes, 1):
                 chunk_filename = f"{super_name}_{i}{file_ext}"
                 st.download_button(
                     label=f"Download {chunk_filename}",
-                    data=chunk.encode('utf-8'),
+                    data=chunk_bytes,
                     file_name=chunk_filename,
                     mime="text/plain",
                     key=f"dl_{i}"  # Fixed key format for JavaScript targeting
@@ -1,18 +1,19 @@
+import re
+
 import streamlit as st
+import streamlit.components.v1 as components
 
-def show_popup():
-    """
-    Displays a pop-up message in the Streamlit app.
-    """
-    st.markdown("""
-    <style>
+# The popup's styles, kept apart from the markup so the page only parses them once
+_POPUP_CSS = """
     /* Pop-up container */
     .popup {
-        display: block;  /* Changed from 'none' to 'block' */
         position: fixed;
         top: 50%;
         left: 50%;
-        transform: translate(-50%, -50%);
+        /* Closed state; opening scales it up and fades it in */
+        transform: translate(-50%, -50%) scale(0.95);
+        opacity: 0;
+        visibility: hidden;
         background-color: white;
         padding: 30px;
         border-radius: 15px;
@@ -21,12 +22,15 @@ def show_popup():
         text-align: center;
         max-width: 450px;
         font-family: Arial, sans-serif;
-        animation: fadeIn 0.5s ease-in-out;
+        /* Only compositor-friendly properties change, on their own layer */
+        transition: transform 0.5s ease-in-out, opacity 0.5s ease-in-out, visibility 0.5s;
+        will-change: transform, opacity;
+        contain: layout paint;
+        content-visibility: auto;
     }
 
     /* Overlay */
     .overlay {
-        display: block;  /* Changed from 'none' to 'block' */
         position: fixed;
         top: 0;
         left: 0;
@@ -34,12 +38,21 @@ def show_popup():
         height: 100%;
         background-color: rgba(0, 0, 0, 0.5);
         z-index: 999;
+        opacity: 0;
+        visibility: hidden;
+        transition: opacity 0.5s ease-in-out, visibility 0.5s;
+        will-change: opacity;
     }
 
-    /* Fade-in animation */
-    @keyframes fadeIn {
-        from { opacity: 0; }
-        to { opacity: 1; }
+    /* Open state: one class on <body> shows both elements */
+    body.popup-open .popup,
+    body.popup-open .overlay {
+        opacity: 1;
+        visibility: visible;
+    }
+
+    body.popup-open .popup {
+        transform: translate(-50%, -50%) scale(1);
     }
 
     /* Close button */
@@ -80,41 +93,150 @@ def show_popup():
         color: #4CAF50;
         font-weight: bold;
     }
-    </style>
-
-    <!-- Pop-up HTML -->
-    <div class="overlay" id="overlay"></div>
-    <div class="popup" id="popup">
-        <button class="close-btn" onclick="closePopup()">×</button>
-        <h2>Thank You for Downloading! 🎉</h2>
-        <p>**"Efficiency is overrated. Value is what counts."**</p>
-        <p>By downloading <strong>Code_File_Fusion</strong>, you've chosen to add value to your workflow—and that's no small feat.</p>
-        <p>Did you find this tool useful? If yes, here's how you can turn your appreciation into action:</p>
-        <ul style="list-style-type: none; padding: 0;">
-            <li>☕ <strong>$5</strong>: A coffee to keep us coding.</li>
-            <li>🛠️ <strong>$10</strong>: An hour of development (bug-free code, anyone?).</li>
-            <li>🚀 <strong>$20+</strong>: Long-term project sustainability. You're building the future!</li>
-        </ul>
-        <a href="https://www.paypal.com/paypalme/justinduveen?" target="_blank">
-            <button class="donate-btn">Support the Project 🚀</button>
-        </a>
-        <p><em>Your generosity fuels innovation. Every small action creates big change. Let’s build something amazing together!</em></p>
-    </div>
+    """
+
+# The popup's markup and script; built once at import and re-sent as-is.
+# Rendered as a component rather than through st.markdown, so it skips the
+# markdown parser and its script actually runs
+_POPUP_HTML = """
+    <!-- Pop-up HTML; inert until the page-side script below instantiates it into the page -->
+    <template id="popup-tpl">
+        <div class="overlay" id="overlay"></div>
+        <div class="popup" id="popup">
+            <button class="close-btn">×</button>
+            <h2>Thank You for Downloading! 🎉</h2>
+            <p>**"Efficiency is overrated. Value is what counts."**</p>
+            <p>By downloading <strong>Code_File_Fusion</strong>, you've chosen to add value to your workflow—and that's no small feat.</p>
+            <p>Did you find this tool useful? If yes, here's how you can turn your appreciation into action:</p>
+            <ul style="list-style-type: none; padding: 0;">
+                <li>☕ <strong>$5</strong>: A coffee to keep us coding.</li>
+                <li>🛠️ <strong>$10</strong>: An hour of development (bug-free code, anyone?).</li>
+                <li>🚀 <strong>$20+</strong>: Long-term project sustainability. You're building the future!</li>
+            </ul>
+            <a href="https://www.paypal.com/paypalme/justinduveen?" target="_blank">
+                <button class="donate-btn">Support the Project 🚀</button>
+            </a>
+            <p><em>Your generosity fuels innovation. Every small action creates big change. Let’s build something amazing together!</em></p>
+        </div>
+    </template>
+
+    <!-- The pop-up's behaviour; inert here, run as a script of the app page by the loader below -->
+    <script type="text/plain" id="popup-js">
+    (() => {
+        // Node references, filled in once the pop-up is mounted and reused by every show and close
+        let dom = null;
+
+        // Insert the template's overlay and pop-up into the page with a single DOM write,
+        // replacing any nodes left by an earlier render
+        function mountPopup() {
+            for (const id of ['overlay', 'popup']) {
+                const stale = document.getElementById(id);
+                if (stale) stale.remove();
+            }
+            const fragment = document.importNode(document.getElementById('popup-tpl').content, true);
+            dom = {
+                overlay: fragment.getElementById('overlay'),
+                popup: fragment.getElementById('popup')
+            };
+
+            dom.popup.querySelector('.close-btn').addEventListener('click', closePopup);
+            // Clicks on the overlay close the pop-up too, without a round trip to the server
+            dom.overlay.addEventListener('click', closePopup);
+
+            document.body.appendChild(fragment);
+            // Resolve the closed styles now, so the first open transitions from them
+            dom.popup.getBoundingClientRect();
+        }
+
+        // Open and close by toggling one class on the page body in an animation frame
+        function setPopupOpen(open) {
+            requestAnimationFrame(() => {
+                document.body.classList.toggle('popup-open', open);
+            });
+        }
+
+        // Function to show the pop-up
+        function showPopup() {
+            if (dom === null) {
+                mountPopup();
+            }
+            setPopupOpen(true);
+        }
+
+        // Function to close the pop-up
+        function closePopup() {
+            setPopupOpen(false);
+        }
+
+        // Esc closes the pop-up as well
+        document.addEventListener('keydown', (event) => {
+            if (event.key === 'Escape' && document.body.classList.contains('popup-open')) {
+                closePopup();
+            }
+        });
+
+        // Show the pop-up immediately
+        showPopup();
+    })();
+    </script>
 
     <script>
-    // Function to show the pop-up
-    function showPopup() {
-        document.getElementById('overlay').style.display = 'block';
-        document.getElementById('popup').style.display = 'block';
+    // The component renders in a zero-height iframe; move the styles, the template and the
+    // behaviour into the app page so that position: fixed covers the whole viewport.
+    // The behaviour runs as a page script because this iframe is removed on the next rerun,
+    // and browsers stop running callbacks created in a detached iframe's realm.
+    const doc = window.parent.document;
+    // The styles stay from the first render on; later renders do not re-parse them
+    if (!doc.getElementById('popup-style')) {
+        doc.head.appendChild(document.getElementById('popup-style'));
     }
+    const staleTemplate = doc.getElementById('popup-tpl');
+    if (staleTemplate) staleTemplate.remove();
+    doc.body.appendChild(document.getElementById('popup-tpl'));
+    // A script element created by the page's document runs in the page's realm; it has
+    // run by the time appendChild returns, so the element itself can go straight away
+    const script = doc.createElement('script');
+    script.textContent = document.getElementById('popup-js').textContent;
+    doc.body.appendChild(script);
+    script.remove();
+    </script>
+    """
 
-    // Function to close the pop-up
-    function closePopup() {
-        document.getElementById('overlay').style.display = 'none';
-        document.getElementById('popup').style.display = 'none';
-    }
 
-    // Show the pop-up immediately
-    showPopup();
-    </script>
-    """, unsafe_allow_html=True)
\ No newline at end of file
+def _minify_css(css: str) -> str:
+    """Strip comments and layout whitespace from a stylesheet."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    return re.sub(r'\s*([{};,])\s*|(:)\s+', r'\1\2', css).strip()
+
+
+def _minify_html(markup: str) -> str:
+    """Strip HTML comments, whole-line script comments and layout whitespace from markup."""
+    markup = re.sub(r'<!--.*?-->', '', markup, flags=re.S)
+    # Only comments on lines of their own, so "//" inside URLs and strings is untouched
+    markup = re.sub(r'^\s*//.*$', '', markup, flags=re.M)
+    markup = re.sub(r'\s+', ' ', markup)
+    return re.sub(r'>\s+<', '><', markup).strip()
+
+
+# Minified once at import; these are what is actually sent to the browser
+_POPUP_CSS_MIN = _minify_css(_POPUP_CSS)
+_POPUP_HTML_MIN = _minify_html(_POPUP_HTML)
+
+
+@st.cache_resource
+def _popup_document() -> str:
+    """Assemble the component document from the popup styles and markup, once per server process."""
+    return f'<style id="popup-style">{_POPUP_CSS_MIN}</style>{_POPUP_HTML_MIN}'
+
+
+def show_popup():
+    """
+    Displays a pop-up message in the Streamlit app.
+    """
+    # Once per session: the popup nodes stay in the page after the component's
+    # iframe goes away, so later reruns have nothing to re-send
+    if st.session_state.get("_popup_shown"):
+        return
+    st.session_state["_popup_shown"] = True
+    components.html(_popup_document(), height=0, scrolling=False)